@@ -1,37 +1,258 @@
 import socket
-import threading
 import json
 import subprocess
-from queue import Queue
 import ipaddress
 import platform
+import os
+import select
+import struct
+import time
+import asyncio
+import concurrent.futures
+import random
+import shelve
+import threading
+import argparse
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+# uvloop.run() was added in uvloop 0.18; older releases fall back to the standard event loop.
+if uvloop is not None and not hasattr(uvloop, "run"):
+    uvloop = None
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+MAX_PARALLEL_HOSTS = 32
+# Largest CIDR network (a /16 in IPv4) a hosts file line may expand to.
+MAX_NETWORK_ADDRESSES = 1 << 16
+PING_COMMAND = ["ping", "-n" if platform.system() == "Windows" else "-c", "1"]
+# Where supported, probe sockets are created non-blocking instead of switched with a second syscall.
+PROBE_SOCKET_TYPE = socket.SOCK_STREAM | getattr(socket, "SOCK_NONBLOCK", 0)
+RESET_ON_CLOSE = struct.pack("ii", 1, 0)
+TCP_SYN = 0x02
+TCP_ACK = 0x10
+# Frequently targeted TCP services, for quick scans that skip the full port range.
+COMMON_PORTS = (21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 3306, 3389, 5432, 5900, 6379, 8080, 8443)
+SERVICES_FILE = (os.path.join(os.environ.get("SystemRoot", r"C:\Windows"), "System32", "drivers", "etc", "services")
+                 if platform.system() == "Windows" else "/etc/services")
+# Reverse DNS answers are kept on disk between runs; fresh entries skip the lookup and stale
+# ones are still used when a lookup fails.
+PTR_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".portscanner_ptr_cache")
+PTR_CACHE_TTL = 60 * 60
+PTR_CACHE_STALE_TTL = 24 * 60 * 60
+
+_ptr_cache = None
+_ptr_cache_lock = threading.Lock()
 
 
-def is_host_online(host) -> bool:
+def is_host_online(host, timeout=1.0) -> bool:
     """
     Checks if a given host is online by sending a single ping request.
 
     The function executes a system ping command to determine the reachability of the host.
     It suppresses output and error messages for cleaner execution.
     If the ping command succeeds (return code 0), the host is considered online.
-    If the command fails or an exception occurs, the function returns False.
+    If the command fails, takes longer than `timeout` seconds, or an exception occurs,
+    the function returns False.
 
     Args:
         host (str): The IP address or hostname to check.
+        timeout (float): The number of seconds to wait for the ping command to finish.
 
     Returns:
         bool: True if the host responds to the ping request, False otherwise.
     """
     try:
-        if platform.system() == "Windows":
-            response = subprocess.run(["ping", "-n", "1", host], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        else:
-            response = subprocess.run(["ping", "-c", "1", host], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        response = subprocess.run(PING_COMMAND + [host], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
         return response.returncode == 0
     except Exception:
         return False
 
-def get_host_info(host) -> tuple[str, list]:
+def _inet_checksum(data) -> int:
+    """Computes the RFC 1071 one's complement checksum used by ICMP and TCP."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def _icmp_echo_request(ident, seq) -> bytes:
+    """Builds an ICMP echo request packet with the given identifier and sequence number."""
+    payload = b"PortScanner"
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _inet_checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + payload
+
+def _open_icmp_socket() -> tuple:
+    """Opens a raw ICMP socket, falling back to an unprivileged datagram ICMP socket."""
+    for sock_type in (socket.SOCK_RAW, socket.SOCK_DGRAM):
+        try:
+            sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+        except OSError:
+            continue
+        # Every host answers within the same short window, so give the socket room for a burst of replies.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        return sock, sock_type == socket.SOCK_RAW
+    return None, False
+
+def ping_hosts(host_list, timeout=1.0, on_reply=None) -> dict[str, bool]:
+    """
+    Checks which hosts in a list are online by sending ICMP echo requests from a single socket.
+
+    The function sends one echo request per host in a tight loop, draining replies as it goes,
+    then waits up to `timeout` seconds for the remaining replies at once, so the whole list costs a single ping timeout instead of
+    one process spawn and timeout per host. Replies are matched back to hosts by sequence number
+    and source address. If no ICMP socket can be opened (e.g. missing privileges) or a host is
+    not an IPv4 address, the function falls back to `is_host_online` for those hosts; these
+    system pings run in a pool of up to MAX_PARALLEL_HOSTS threads, alongside the ICMP
+    socket, with the same `timeout` each.
+
+    Args:
+        host_list (list): list containing IP addresses to check.
+        timeout (float): The number of seconds to wait for replies after the requests are sent.
+        on_reply (callable): Optional function called with each host as soon as it is found
+            to be online, so callers can start on it before the remaining replies are in.
+
+    Returns:
+        dict[str, bool]: A mapping of each host to True if it replied, False otherwise.
+    """
+    results = {host: False for host in host_list}
+
+    def mark_online(host):
+        results[host] = True
+        if on_reply is not None:
+            on_reply(host)
+
+    sock, raw = _open_icmp_socket()
+    ipv4_hosts = []
+    fallback_hosts = []
+    for host in host_list:
+        try:
+            if sock is not None and ipaddress.ip_address(host).version == 4:
+                ipv4_hosts.append(host)
+                continue
+        except ValueError:
+            pass
+        fallback_hosts.append(host)
+
+    fallback_pool = None
+    fallback_pings = {}
+    if fallback_hosts:
+        fallback_pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_HOSTS, len(fallback_hosts)))
+        fallback_pings = {fallback_pool.submit(is_host_online, host, timeout): host for host in fallback_hosts}
+
+    if sock is not None:
+        ident = os.getpid() & 0xFFFF
+        with sock:
+            # Sequence numbers are 16 bits wide and may repeat, so replies are also matched by address.
+            pending = {}
+
+            def collect(wait):
+                deadline = time.monotonic() + wait
+                while pending and select.select([sock], [], [], max(0, deadline - time.monotonic()))[0]:
+                    try:
+                        packet, (address, _) = sock.recvfrom(1024)
+                    except OSError:
+                        continue
+                    # Raw sockets, and datagram sockets on macOS and BSD, deliver the IPv4 header in
+                    # front of the ICMP message; an ICMP message never starts with 0x4_ (echo reply is 0).
+                    if packet and packet[0] >> 4 == 4:
+                        packet = packet[(packet[0] & 0x0F) * 4:]
+                    if len(packet) < 8:
+                        continue
+                    icmp_type, _, _, reply_ident, seq = struct.unpack("!BBHHH", packet[:8])
+                    # Datagram ICMP sockets rewrite the identifier, so it is only checked on raw sockets.
+                    if icmp_type != ICMP_ECHO_REPLY or (raw and reply_ident != ident):
+                        continue
+                    host = pending.pop((seq, address), None)
+                    if host is not None:
+                        mark_online(host)
+
+            for index, host in enumerate(ipv4_hosts):
+                seq = index & 0xFFFF
+                try:
+                    sock.sendto(_icmp_echo_request(ident, seq), (host, 0))
+                    pending[(seq, host)] = host
+                except OSError:
+                    pass
+                # Drain replies as we go so they do not overflow the socket's receive buffer.
+                if (index + 1) % 64 == 0:
+                    collect(0)
+            collect(timeout)
+
+    if fallback_pool is not None:
+        with fallback_pool:
+            for ping in concurrent.futures.as_completed(fallback_pings):
+                if ping.result():
+                    mark_online(fallback_pings[ping])
+    return results
+
+def load_ptr_cache() -> None:
+    """
+    Loads the persistent PTR cache from PTR_CACHE_FILE into memory.
+
+    The shelf is only touched here and in `save_ptr_cache`, both called from the same thread,
+    because some dbm backends (e.g. dbm.sqlite3 on Python 3.13+) cannot be used from any thread
+    other than the one that opened them. `resolve_ptr` worker threads only see the in-memory copy.
+    Entries older than PTR_CACHE_STALE_TTL are dropped. If the cache cannot be read, scanning
+    continues with an empty cache.
+    """
+    global _ptr_cache
+    entries = {}
+    now = time.time()
+    try:
+        with shelve.open(PTR_CACHE_FILE, flag="c") as shelf:
+            for host in shelf:
+                entry = shelf[host]
+                if now - entry["t"] < PTR_CACHE_STALE_TTL:
+                    entries[host] = entry
+    except Exception as e:
+        # A broken cache only costs persistence, never the scan.
+        print(f"Could not read PTR cache {PTR_CACHE_FILE} ({e}), continuing without it. Delete the {PTR_CACHE_FILE}* files to reset it.")
+    with _ptr_cache_lock:
+        _ptr_cache = entries
+
+def save_ptr_cache() -> None:
+    """
+    Writes the in-memory PTR cache back to PTR_CACHE_FILE and unloads it.
+
+    Must be called from the thread that called `load_ptr_cache`. Does nothing if the cache
+    was never loaded, and reports rather than raises if the file cannot be written.
+    """
+    global _ptr_cache
+    with _ptr_cache_lock:
+        entries, _ptr_cache = _ptr_cache, None
+    if entries is None:
+        return
+    try:
+        with shelve.open(PTR_CACHE_FILE, flag="n") as shelf:
+            shelf.update(entries)
+    except Exception as e:
+        print(f"Could not save PTR cache {PTR_CACHE_FILE}: {e}")
+
+def _ptr_cache_get(host):
+    """Returns the in-memory PTR cache entry for a host, or None if it has none or no cache is loaded."""
+    with _ptr_cache_lock:
+        if _ptr_cache is None:
+            return None
+        return _ptr_cache.get(host)
+
+def _ptr_cache_set(host, entry) -> None:
+    """Stores a PTR cache entry for a host if a cache is loaded."""
+    with _ptr_cache_lock:
+        if _ptr_cache is not None:
+            _ptr_cache[host] = entry
+
+def resolve_ptr(host) -> tuple[str, list]:
     """
     Retrieves the hostname and alias information for a given IP address or hostname.
 
@@ -39,6 +260,9 @@ def get_host_info(host) -> tuple[str, list]:
     If the lookup is successful, it returns the resolved hostname and alias list.
     If the lookup fails due to an error (e.g., host not found), it returns `"Unknown"`
     as the hostname and an empty list for aliases.
+    While a cache is loaded with `load_ptr_cache`, entries younger than PTR_CACHE_TTL are
+    returned without a lookup, and entries younger than PTR_CACHE_STALE_TTL are returned when
+    the lookup fails.
 
     Args:
         host (str): The IP address or hostname to look up.
@@ -48,111 +272,356 @@ def get_host_info(host) -> tuple[str, list]:
             - The resolved hostname (or "Unknown" if resolution fails).
             - A list of alias names associated with the host (empty if none exist).
     """
+    now = time.time()
+    cached = _ptr_cache_get(host)
+    if cached is not None and now - cached["t"] < PTR_CACHE_TTL:
+        return cached["hn"], cached["al"]
+
     try:
         hostname,alias,_ = socket.gethostbyaddr(host)
     except (socket.herror, socket.gaierror):
-        hostname, alias = "Unknown", []
+        if cached is not None and now - cached["t"] < PTR_CACHE_STALE_TTL:
+            return cached["hn"], cached["al"]
+        return "Unknown", []
+    _ptr_cache_set(host, {"hn": hostname, "al": alias, "t": now})
     return hostname, alias
 
-def scan_port(host, port, output_queue) -> None:
-    """Attempts to connect to a port on the given host."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.settimeout(.5)
-        if sock.connect_ex((host, port)) == 0:
-            output_queue.put(port)
+def _socket_limit(requested) -> int:
+    """Caps the number of in-flight sockets to what the process's open file limit allows."""
+    try:
+        import resource
+        soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    except (ImportError, ValueError, OSError):
+        return max(1, requested)
+    if soft_limit == resource.RLIM_INFINITY:
+        return max(1, requested)
+    return max(1, min(requested, soft_limit - 64))
+
+def registered_ports(ports, services_file=SERVICES_FILE) -> list[int]:
+    """
+    Filters a list of ports down to those with a TCP service registered in the services file.
+
+    Args:
+        ports (Iterable[int]): The port numbers to filter.
+        services_file (str): Path to the services database to read.
+
+    Returns:
+        list[int]: The ports, in their original order, that have a registered TCP service.
+            If the services file cannot be read, all ports are returned unchanged.
+    """
+    registered = set()
+    try:
+        with open(services_file, encoding="utf-8", errors="replace") as services:
+            for line in services:
+                fields = line.split("#", 1)[0].split()
+                if len(fields) >= 2 and fields[1].endswith("/tcp"):
+                    port = fields[1][:-len("/tcp")]
+                    if port.isdigit():
+                        registered.add(int(port))
+    except OSError:
+        return list(ports)
+    return [port for port in ports if port in registered]
+
+async def _probe_worker(family, sockaddr, ports, open_ports, timeout, connection_slots) -> None:
+    """Probes ports taken from a shared iterator until it is exhausted, collecting the open ones."""
+    loop = asyncio.get_running_loop()
+    for port in ports:
+        address = (sockaddr[0], port) + sockaddr[2:]
+        if connection_slots is None:
+            await _probe_port(loop, family, address, open_ports, timeout)
+            continue
+        async with connection_slots:
+            await _probe_port(loop, family, address, open_ports, timeout)
 
-def worker(host, queue, output_queue) -> None:
-    """Worker function to process ports from the queue."""
-    while not queue.empty():
-        port = queue.get()
-        scan_port(host, port, output_queue)
-        queue.task_done()
+async def _probe_port(loop, family, address, open_ports, timeout) -> None:
+    """Attempts one non-blocking connection, recording the port if it succeeds."""
+    with socket.socket(family, PROBE_SOCKET_TYPE) as sock:
+        if PROBE_SOCKET_TYPE == socket.SOCK_STREAM:
+            sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, address), timeout)
+        except (OSError, asyncio.TimeoutError):
+            return
+        # Close with an RST instead of a FIN so open ports do not leave TIME_WAIT entries behind.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, RESET_ON_CLOSE)
+        open_ports.append(address[1])
 
-def port_scanner(host, start_port, end_port, num_threads) -> list[int]:
+async def port_scanner(host, ports, concurrency, timeout=.5, connection_slots=None) -> list[int]:
     """
-    Scans a specified range of ports on a given host using multithreading.
+    Scans the specified ports on a given host using asyncio.
 
-    The function creates worker threads to efficiently scan the specified range of ports,
-    checking if they are open. It uses a queue system to distribute scanning tasks among 
-    multiple threads for faster execution.
+    The function starts up to `concurrency` worker coroutines on the running event loop, each
+    taking the next port from one shared iterator, so closed or filtered ports cost a shared
+    timeout on a single thread instead of blocking a thread each. The workers need no queue or
+    lock to divide the ports, and the scan ends when the iterator runs out. Short port lists
+    get only as many workers as they have ports. When `connection_slots` is given, every
+    connection attempt also holds one of its slots, so scans of several hosts can share one
+    limit on open sockets. A port is reported open when its connection completes within
+    `timeout` seconds.
 
     Args:
         host (str): The target IP address or hostname to scan.
-        start_port (int): The starting port number for the scan.
-        end_port (int): The ending port number for the scan.
-        num_threads (int): The number of worker threads to use for scanning. 
+        ports (Sequence[int]): The port numbers to scan, e.g. a range or COMMON_PORTS.
+        concurrency (int): The maximum number of connection attempts in flight at once.
+            This is capped by the process's open file limit.
+        timeout (float): The number of seconds to wait for each connection attempt.
+        connection_slots (asyncio.Semaphore): Optional semaphore shared with other scans that
+            bounds their combined connection attempts. Without one, the worker count alone
+            bounds this scan to `concurrency`.
 
     Returns:
-        list[int]: A list of open ports discovered on the target host.
+        list[int]: A sorted list of open ports discovered on the target host.
     """
-    port_queue = Queue()
-    output_queue = Queue()
-    
-    for port in range(start_port, end_port + 1):
-        port_queue.put(port)
-    
-    threads = []
-    for _ in range(num_threads):
-        thread = threading.Thread(target=worker, args=(host, port_queue, output_queue))
-        thread.daemon = True  # Daemon threads will exit when the main program exits
-        thread.start()
-        threads.append(thread)
-    
-    port_queue.join()
-    
+    loop = asyncio.get_running_loop()
+    try:
+        family, _, _, _, sockaddr = (await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM))[0]
+    except socket.gaierror:
+        return []
+
+    port_iterator = iter(ports)
     open_ports = []
-    while not output_queue.empty():
-        open_ports.append(output_queue.get())
-    
-    return open_ports
+    workers = min(_socket_limit(concurrency), len(ports))
+    await asyncio.gather(
+        *(_probe_worker(family, sockaddr, port_iterator, open_ports, timeout, connection_slots) for _ in range(workers))
+    )
+    return sorted(open_ports)
+
+def _tcp_syn_segment(source_ip, dest_ip, source_port, dest_port, seq) -> bytes:
+    """Builds a TCP SYN segment, with its checksum computed over the IPv4 pseudo-header."""
+    header = struct.pack("!HHLLBBHHH", source_port, dest_port, seq, 0, 5 << 4, TCP_SYN, 1024, 0, 0)
+    pseudo_header = socket.inet_aton(source_ip) + socket.inet_aton(dest_ip) + struct.pack("!BBH", 0, socket.IPPROTO_TCP, len(header))
+    checksum = _inet_checksum(pseudo_header + header)
+    return header[:16] + struct.pack("!H", checksum) + header[18:]
+
+def _raw_tcp_available() -> bool:
+    """Checks whether this process may open the raw TCP socket a SYN scan needs."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+def syn_scanner(host, ports, timeout=.5) -> list[int]:
+    """
+    Scans the specified ports on a given IPv4 host with half-open TCP SYN probes.
+
+    The function sends a hand-built SYN segment to every port from one raw socket and reads
+    the replies on that same socket. Ports answering with SYN-ACK are reported open; the
+    local kernel then resets these unsolicited connections, so no handshake is ever completed
+    and no per-port socket is created. Replies keep being collected for `timeout` seconds
+    after the last probe is sent.
+
+    Requires the privilege to open raw sockets (root or CAP_NET_RAW on Linux); Windows does not
+    allow sending TCP over raw sockets at all.
+
+    Args:
+        host (str): The target IPv4 address to scan.
+        ports (Sequence[int]): The port numbers to scan, e.g. a range or COMMON_PORTS.
+        timeout (float): The number of seconds to wait for replies after the last probe.
+
+    Returns:
+        list[int]: A sorted list of open ports discovered on the target host.
+
+    Raises:
+        OSError: If the raw socket cannot be opened or the host cannot be reached.
+    """
+    # The kernel picks the outgoing interface address for us when a UDP socket is connected.
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as route:
+        route.connect((host, 9))
+        source_ip = route.getsockname()[0]
+
+    source_port = random.randint(32768, 60999)
+    seq = random.getrandbits(32)
+    expected_ack = (seq + 1) & 0xFFFFFFFF
+    open_ports = set()
+
+    with socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP) as sock:
+        # The raw socket sees every inbound TCP segment, so give it room for a burst of replies.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+
+        def collect(wait):
+            deadline = time.monotonic() + wait
+            while select.select([sock], [], [], max(0, deadline - time.monotonic()))[0]:
+                packet, (address, _) = sock.recvfrom(65535)
+                # Raw sockets deliver the IP header in front of the TCP segment.
+                segment = packet[(packet[0] & 0x0F) * 4:]
+                if address != host or len(segment) < 14:
+                    continue
+                port, dest_port, _, ack = struct.unpack("!HHLL", segment[:12])
+                flags = segment[13]
+                if dest_port == source_port and ack == expected_ack and flags & (TCP_SYN | TCP_ACK) == TCP_SYN | TCP_ACK:
+                    open_ports.add(port)
+
+        for sent, port in enumerate(ports, 1):
+            sock.sendto(_tcp_syn_segment(source_ip, host, source_port, port, seq), (host, 0))
+            # Drain replies as we go so they do not overflow the socket's receive buffer.
+            if sent % 256 == 0:
+                collect(0)
+        collect(timeout)
+
+    return sorted(open_ports.intersection(ports))
+
+async def _scan_ports(host, ports, concurrency, syn_scan, connection_slots) -> list[int]:
+    """Scans a host's ports with `syn_scanner` when requested and possible, otherwise with `port_scanner`."""
+    if syn_scan and ipaddress.ip_address(host).version == 4:
+        try:
+            return await asyncio.to_thread(syn_scanner, host, ports)
+        except OSError as e:
+            print(f"SYN scan of {host} failed ({e}), using a connect scan instead.")
+    return await port_scanner(host, ports, concurrency, connection_slots=connection_slots)
 
-def scan_from_file(host_list, start_port, end_port, num_threads, output_filename) -> None:
+async def scan_host(host, online, ports, concurrency, resolve_names=True, syn_scan=False, connection_slots=None) -> dict:
+    """
+    Collects the scan result record for a single host.
+
+    The port scan only runs when the host responded to the ping, and the hostname lookup runs
+    in a worker thread while the ports are being scanned. With `syn_scan`, IPv4 hosts are
+    scanned by `syn_scanner` in a worker thread, falling back to the connect scan if the raw
+    socket cannot be used for this host.
+
+    Args:
+        host (str): The IP address to scan.
+        online (bool): Whether the host responded to the ping.
+        ports (Sequence[int]): The port numbers to scan on each online host.
+        concurrency (int): The maximum number of connection attempts in flight for this host.
+        resolve_names (bool): Whether to look up the hostname and aliases if the host is online.
+        syn_scan (bool): Whether to use a half-open SYN scan instead of full connections.
+        connection_slots (asyncio.Semaphore): Optional semaphore shared with other hosts' scans,
+            as accepted by `port_scanner`.
+
+    Returns:
+        dict: The host's state, hostname, alias list, and open ports.
+    """
+    print(f"Scanning {host}...")
+    state = "Online" if online else "Offline"
+    hostname, alias = "Unknown", []
+    open_ports = []
+
+    if state == "Online":
+        scan = _scan_ports(host, ports, concurrency, syn_scan, connection_slots)
+        if resolve_names:
+            (hostname, alias), open_ports = await asyncio.gather(asyncio.to_thread(resolve_ptr, host), scan)
+        else:
+            open_ports = await scan
+
+    return {
+        "State": state,
+        "Hostname": hostname,
+        "Alias": alias,
+        "Open Ports": open_ports
+    }
+
+def _to_json(obj) -> str:
+    """Serializes an object to compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+def _write_record(outfile, host, record, first) -> None:
+    """Appends one host's result record to a JSON object being streamed to `outfile`."""
+    outfile.write("\n" if first else ",\n")
+    outfile.write(f"{_to_json(host)}:{_to_json(record)}")
+
+async def scan_hosts(host_list, ports, concurrency, outfile, resolve_names=True, syn_scan=False) -> None:
+    """
+    Pings, resolves and scans several hosts concurrently and streams their result records to an open file.
+
+    All hosts are pinged at once by `ping_hosts` in a worker thread, and each host moves on
+    as soon as its own echo reply arrives instead of waiting out the whole ping timeout.
+    Online hosts then have their hostname looked up while their ports are scanned, unless
+    `resolve_names` is False; offline hosts are reported as "Unknown". Up to
+    MAX_PARALLEL_HOSTS hosts are scanned at once, and all of their connect scans share one
+    budget of `concurrency` open sockets, so scanning more hosts never opens more sockets.
+    Each record is written as soon as its host finishes, so only the hosts in flight are held
+    in memory. The file ends up holding one JSON object keyed by host, with one host per line.
+
+    Args:
+        host_list (list): list containing IP addresses to scan.
+        ports (Sequence[int]): The port numbers to scan on each online host.
+        concurrency (int): The maximum number of connection attempts in flight across all hosts.
+        outfile (TextIO): The open file the JSON results are written to.
+        resolve_names (bool): Whether to look up the hostname and aliases of online hosts.
+        syn_scan (bool): Whether to use a half-open SYN scan instead of full connections. Ignored,
+            with a warning, when raw sockets are not available.
+
+    Returns:
+        None: The results are written to `outfile` in the order the hosts finish. If the scan
+            fails, the JSON object is still closed around the hosts written so far.
+    """
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_HOSTS)
+    connection_slots = asyncio.Semaphore(_socket_limit(concurrency))
+    if syn_scan and not _raw_tcp_available():
+        print("SYN scan requires raw socket privileges, using a connect scan instead.")
+        syn_scan = False
+
+    loop = asyncio.get_running_loop()
+    replies = {host: loop.create_future() for host in host_list}
+
+    def on_reply(host):
+        loop.call_soon_threadsafe(replies[host].set_result, True)
+
+    pinging = asyncio.ensure_future(asyncio.to_thread(ping_hosts, host_list, 1.0, on_reply))
+    written = 0
+
+    async def scan_one(host):
+        nonlocal written
+        await asyncio.wait((replies[host], pinging), return_when=asyncio.FIRST_COMPLETED)
+        online = replies[host].done() or pinging.result()[host]
+        async with semaphore:
+            record = await scan_host(host, online, ports, concurrency, resolve_names, syn_scan, connection_slots)
+        _write_record(outfile, host, record, written == 0)
+        written += 1
+
+    outfile.write("{")
+    try:
+        await asyncio.gather(*(scan_one(host) for host in host_list))
+        await pinging
+    finally:
+        # Close the object even if the scan fails, so the hosts written so far remain valid JSON.
+        outfile.write("\n}\n")
+
+def scan_from_file(host_list, ports, concurrency, output_filename, resolve_names=True, syn_scan=False) -> bool:
     """
     Reads a file containing a list of IP addresses, scans each for open ports, and saves the results.
 
     The function performs the following steps:
     - Reads the IP addresses from the specified host list.
-    - Checks if each host is online.
-    - Retrieves hostname and alias information for each host.
-    - If the host is online, scans for open ports within the given range using multithreading.
-    - Stores the scan results, including host state, hostname, alias, and open ports.
-    - Saves the results as a JSON file.
+    - Checks which hosts are online with a single batched ping.
+    - Scans several hosts at once on one asyncio event loop (uvloop's, when it is installed),
+      starting each as soon as it answers the ping.
+    - If the host is online, retrieves its hostname and alias information (if requested)
+      while scanning the given ports for open ones.
+    - Writes each host's state, hostname, alias, and open ports to the JSON file as soon as it finishes.
 
     Args:
         host_list (list): list containing IP addresses to scan.
-        start_port (int): The starting port number for scanning.
-        end_port (int): The ending port number for scanning.
-        num_threads (int): The number of threads to use for scanning.
+        ports (Sequence[int]): The port numbers to scan on each online host.
+        concurrency (int): The maximum number of connection attempts in flight across all hosts.
         output_filename (str): Path to the output JSON file where results will be saved.
+        resolve_names (bool): Whether to look up the hostname and aliases of online hosts.
+        syn_scan (bool): Whether to use a half-open SYN scan instead of full connections.
 
     Returns:
-        None: The results are written to the specified output file.
+        bool: True once the results are written to the specified output file, False if the file
+            could not be opened and no scan was run. Errors raised while scanning propagate to the caller.
     """
         
-    results = {}
-    for host in host_list:
-
-        print(f"Scanning {host}...")
-        state = "Online" if is_host_online(host) else "Offline"
-        hostname, alias = get_host_info(host)
-        open_ports = []
-        
-        if state == "Online":
-            open_ports = port_scanner(host, start_port, end_port, num_threads)
-        
-        results[host] = {
-            "State": state,
-            "Hostname": hostname,
-            "Alias": alias,
-            "Open Ports": open_ports
-        }
-    
     try:
-        with open(output_filename, 'w') as outfile:
-            json.dump(results, outfile, indent=4)
-            print(f"Scan results saved to {output_filename}")
+        outfile = open(output_filename, 'w', encoding="utf-8")
     except IOError as e:
         print(f"Error writing output file: {e}")
+        return False
+
+    if resolve_names:
+        load_ptr_cache()
+    try:
+        with outfile:
+            run = uvloop.run if uvloop is not None else asyncio.run
+            run(scan_hosts(host_list, ports, concurrency, outfile, resolve_names, syn_scan))
+        print(f"Scan results saved to {output_filename}")
+    finally:
+        save_ptr_cache()
+    return True
 
 def check_file() -> list:
     """
@@ -161,19 +630,19 @@ def check_file() -> list:
     The function performs the following operations:
     - Ensures the specified file exists before proceeding.
     - Reads and processes the file line by line.
-    - Validates each line to check if it is a valid IP address.
+    - Validates each line to check if it is a valid IP address or CIDR network.
+    - Expands CIDR networks (e.g. `192.168.1.0/24`) into their usable host addresses,
+      skipping networks larger than MAX_NETWORK_ADDRESSES addresses.
     - Removes duplicate and invalid IP addresses from the final list.
 
     Returns:
-        list[str]: A list of unique, valid IP addresses extracted from the file.
+        list[str]: A list of unique, valid IP addresses extracted from the file, in file order.
     """
-    return_list = []
     while True:
         input_file = input("Enter the path to the file containing IP addresses: ")
         try:
-            
-            try_file = open(input_file)
-            try_file.close()
+            with open(input_file, encoding="utf-8"):
+                pass
             break
         except FileNotFoundError:
             print(f"File {input_file} was not found! Please try again.")
@@ -181,15 +650,45 @@ def check_file() -> list:
             # Handle the exception
             print("An error occurred:", e)
 
-    with open(input_file) as working_file:
-        for line in working_file:
-            line =line.strip()
+    return read_hosts_file(input_file)
+
+def read_hosts_file(input_file) -> list:
+    """
+    Reads a file of IP addresses and CIDR networks into a list of unique host addresses.
+
+    Lines that are neither a valid IP address nor a valid CIDR network are skipped. CIDR
+    networks (e.g. `192.168.1.0/24`) are expanded into their usable host addresses. Networks
+    with more than MAX_NETWORK_ADDRESSES addresses (65536, i.e. larger than an IPv4 /16 or an
+    IPv6 /112) are skipped with a message naming the line, since expanding them would never
+    finish or would exhaust memory.
+
+    Args:
+        input_file (str): Path to the file containing one IP address or network per line.
+
+    Returns:
+        list[str]: A list of unique, valid IP addresses extracted from the file, in file order.
+
+    Raises:
+        OSError: If the file cannot be opened.
+    """
+    return_list = []
+    seen = set()
+    with open(input_file, encoding="utf-8") as working_file:
+        for line_number, line in enumerate(working_file, 1):
+            line = line.strip()
             try:
-                ip = ipaddress.ip_address(line)
-                if line not in return_list:
-                    return_list.append(line)
+                network = ipaddress.ip_network(line, strict=False)
             except ValueError:
-                pass
+                continue
+            if network.num_addresses > MAX_NETWORK_ADDRESSES:
+                print(f"Skipping line {line_number} ({line}): networks larger than {MAX_NETWORK_ADDRESSES} addresses are not expanded.")
+                continue
+            addresses = network.hosts() if network.num_addresses > 1 else [network.network_address]
+            for address in addresses:
+                ip = str(address)
+                if ip not in seen:
+                    seen.add(ip)
+                    return_list.append(ip)
 
     return return_list
             
@@ -198,8 +697,8 @@ def TCP_port_check() -> tuple[int,int]:
     Prompts the user to input a valid start and end TCP port range.
 
     The function ensures that:
-    - The start port is between 1 and 65000 (inclusive).
-    - The end port is between the specified start port and 65000 (inclusive).
+    - The start port is between 1 and 65535 (inclusive).
+    - The end port is between the specified start port and 65535 (inclusive).
     - Invalid inputs trigger appropriate error messages, prompting the user to re-enter values.
 
     Returns:
@@ -208,56 +707,214 @@ def TCP_port_check() -> tuple[int,int]:
     while True:
         try:
             start_port = int(input("Enter the start TCP port: "))
-            if start_port >= 1 and start_port <= 65000:
+            if start_port >= 1 and start_port <= 65535:
                 break
             raise ValueError
         except ValueError:
-            print(f"Entry is invalid! Please enter a number from 1 to 65000.")
+            print(f"Entry is invalid! Please enter a number from 1 to 65535.")
         except Exception as e:
             print(e)
 
     while True:
         try:
             end_port = int(input("Enter the end TCP port: "))
-            if end_port >= start_port and end_port <= 65000:
+            if end_port >= start_port and end_port <= 65535:
                 break
             raise ValueError
         except ValueError:
-            print(f"Entry is invalid! Please enter a number from {start_port} to 65000.")
+            print(f"Entry is invalid! Please enter a number from {start_port} to 65535.")
         except Exception as e:
             print(e)
     
     return start_port,end_port
 
-def get_threads_count() -> int:
+def get_concurrency_count() -> int:
     """
-    Prompts the user to input the number of threads to use.
+    Prompts the user to input the number of simultaneous connection attempts to use.
     
-    - If the user presses Enter without entering a value, a default of 100 is returned.
+    - If the user presses Enter without entering a value, a default of 1000 is returned.
     - Ensures that the user provides a valid integer input.
     - If an invalid entry is detected, an error message is displayed,
       and the user is prompted to enter the value again.
 
     Returns:
-        int: The validated number of threads specified by the user, or the default value of 100.
+        int: The validated number of simultaneous connections specified by the user, or the default value of 1000.
     """
-    default_threads = 100
+    default_concurrency = 1000
     while True:
         try:
-            threads = input(f"Enter the number of threads to use (default {default_threads}): ").strip()
-            if threads == "":
-                return default_threads
-            threads = int(threads)
-            return threads
+            concurrency = input(f"Enter the number of simultaneous connections to use (default {default_concurrency}): ").strip()
+            if concurrency == "":
+                return default_concurrency
+            concurrency = int(concurrency)
+            return concurrency
         except ValueError:
             print("Invalid entry! Please enter a valid number or press Enter to use the default.")
         except Exception as e:
             print(e)
 
-if __name__ == "__main__":
+def _ask_yes_no(prompt, default) -> bool:
+    """Prompts the user with a yes/no question until a valid answer is entered."""
+    hint = "Y/n" if default else "y/N"
+    while True:
+        choice = input(f"{prompt} ({hint}): ").strip().lower()
+        if choice == "":
+            return default
+        if choice in ("y", "yes"):
+            return True
+        if choice in ("n", "no"):
+            return False
+        print("Invalid entry! Please enter y or n, or press Enter to use the default.")
+
+def get_resolve_choice() -> bool:
+    """
+    Prompts the user whether to look up the hostnames of online hosts.
+
+    - If the user presses Enter without entering a value, hostnames are looked up.
+    - Accepts "y"/"yes" or "n"/"no" in any case.
+    - If an invalid entry is detected, an error message is displayed,
+      and the user is prompted to enter the value again.
+
+    Returns:
+        bool: True if hostnames should be looked up, False otherwise.
+    """
+    return _ask_yes_no("Look up hostnames of online hosts?", True)
+
+def get_syn_scan_choice() -> bool:
+    """
+    Prompts the user whether to use a half-open SYN scan instead of full TCP connections.
+
+    - If the user presses Enter without entering a value, a connect scan is used.
+    - Accepts "y"/"yes" or "n"/"no" in any case.
+    - If an invalid entry is detected, an error message is displayed,
+      and the user is prompted to enter the value again.
+
+    Returns:
+        bool: True if a SYN scan should be used, False otherwise.
+    """
+    return _ask_yes_no("Use a SYN scan (requires root)?", False)
+
+def get_common_ports_choice() -> bool:
+    """
+    Prompts the user whether to scan only the ports in COMMON_PORTS instead of a range.
+
+    - If the user presses Enter without entering a value, a port range is asked for instead.
+    - Accepts "y"/"yes" or "n"/"no" in any case.
+    - If an invalid entry is detected, an error message is displayed,
+      and the user is prompted to enter the value again.
+
+    Returns:
+        bool: True if only the common ports should be scanned, False otherwise.
+    """
+    return _ask_yes_no("Scan only common ports?", False)
+
+def get_registered_ports_choice() -> bool:
+    """
+    Prompts the user whether to skip ports with no TCP service registered in the services file.
+
+    - If the user presses Enter without entering a value, every port in the range is scanned.
+    - Accepts "y"/"yes" or "n"/"no" in any case.
+    - If an invalid entry is detected, an error message is displayed,
+      and the user is prompted to enter the value again.
+
+    Returns:
+        bool: True if only registered ports should be scanned, False otherwise.
+    """
+    return _ask_yes_no("Scan only ports with a registered service?", False)
+
+def _tcp_port(value) -> int:
+    """Converts a command-line value to a TCP port number, rejecting values outside 1-65535."""
+    try:
+        port = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid port number: {value!r}")
+    if not 1 <= port <= 65535:
+        raise argparse.ArgumentTypeError(f"port must be from 1 to 65535, got {port}")
+    return port
+
+def _positive_int(value) -> int:
+    """Converts a command-line value to an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parses and validates the command-line options for a non-interactive scan.
+
+    Args:
+        argv (list[str]): The arguments to parse. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        argparse.Namespace: The parsed options, with `ports` set to the ports to scan.
+    """
+    parser = argparse.ArgumentParser(description="Scan hosts listed in a file for open TCP ports.")
+    parser.add_argument("--hosts-file", required=True, help="file with one IP address or CIDR network per line")
+    parser.add_argument("--output", required=True, help="path of the JSON file to write the results to")
+    # Range options default to None so parse_args can tell whether they were given with --top-ports.
+    parser.add_argument("--start-port", type=_tcp_port, help="first port of the range to scan (default: 1)")
+    parser.add_argument("--end-port", type=_tcp_port, help="last port of the range to scan (default: 1024)")
+    parser.add_argument("--top-ports", action="store_true", help="scan only the common ports instead of a range")
+    parser.add_argument("--registered-only", action="store_true",
+                        help="skip ports in the range that have no TCP service in the services file")
+    parser.add_argument("--concurrency", "--threads", type=_positive_int, default=1000,
+                        help="simultaneous connection attempts, shared by all hosts (default: 1000)")
+    parser.add_argument("--no-resolve", dest="resolve_names", action="store_false",
+                        help="do not look up hostnames of online hosts")
+    parser.add_argument("--syn", dest="syn_scan", action="store_true",
+                        help="use a half-open SYN scan (requires root)")
+    args = parser.parse_args(argv)
+
+    if args.top_ports:
+        if args.start_port is not None or args.end_port is not None or args.registered_only:
+            parser.error("--top-ports cannot be combined with --start-port, --end-port or --registered-only")
+        args.ports = COMMON_PORTS
+    else:
+        if args.start_port is None:
+            args.start_port = 1
+        if args.end_port is None:
+            args.end_port = 1024
+        if args.end_port < args.start_port:
+            parser.error(f"--end-port ({args.end_port}) must not be lower than --start-port ({args.start_port})")
+        args.ports = range(args.start_port, args.end_port + 1)
+        if args.registered_only:
+            args.ports = registered_ports(args.ports)
+    return args
+
+def main_with_args(argv=None) -> None:
+    """Runs a scan configured entirely from command-line options, without prompting."""
+    args = parse_args(argv)
+    try:
+        host_list = read_hosts_file(args.hosts_file)
+    except OSError as e:
+        sys.exit(f"Error reading hosts file: {e}")
+    # Exit non-zero so cron jobs and scripts can tell that no scan was run.
+    if not scan_from_file(host_list, args.ports, args.concurrency, args.output, args.resolve_names, args.syn_scan):
+        sys.exit(f"Scan not run: could not open output file {args.output}")
+
+def main_interactive() -> None:
+    """Runs a scan configured by prompting the user for each setting."""
     host_list = check_file()
-    start_port,end_port = TCP_port_check()
-    threads = get_threads_count()
+    if get_common_ports_choice():
+        ports = COMMON_PORTS
+    else:
+        start_port,end_port = TCP_port_check()
+        ports = range(start_port, end_port + 1)
+        if get_registered_ports_choice():
+            ports = registered_ports(ports)
+    concurrency = get_concurrency_count()
+    resolve_names = get_resolve_choice()
+    syn_scan = get_syn_scan_choice()
     output_file = input("Enter the output filename (JSON format): ")
     
-    scan_from_file(host_list, start_port, end_port, threads, output_file)
+    scan_from_file(host_list, ports, concurrency, output_file, resolve_names, syn_scan)
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        main_with_args()
+    else:
+        main_interactive()
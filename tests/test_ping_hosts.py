@@ -0,0 +1,26 @@
+import ipaddress
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import PortScanner
+
+
+class PingHostsTest(unittest.TestCase):
+    def setUp(self):
+        sock, _ = PortScanner._open_icmp_socket()
+        if sock is None:
+            self.skipTest("no ICMP socket available")
+        sock.close()
+
+    def test_loopback_network_is_all_online(self):
+        # Every reply arrives at once, so this fails if replies overflow the receive buffer.
+        hosts = [str(host) for host in ipaddress.ip_network("127.0.0.0/24").hosts()]
+        results = PortScanner.ping_hosts(hosts, timeout=2.0)
+        self.assertEqual([host for host, online in results.items() if not online], [])
+
+
+if __name__ == "__main__":
+    unittest.main()